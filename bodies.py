@@ -1,4 +1,5 @@
 import math
+import config
 
 class CelestialBody:
     def __init__(self, name, ro, r, speed, color, parent=None, pixels_per_au=100):
@@ -41,26 +42,31 @@ class CelestialBody:
     #     y = center_y + (self.y - center_y) * zoom
     #     return x, y
 
-    def draw(self, canvas, center_x, center_y, zoom=1.0):
+    # pos / parent_pos: optional (x, y) taken from a simulation snapshot.
+    # When omitted the live self.x / self.y (or the parent's) are used.
+    def draw(self, canvas, center_x, center_y, zoom=1.0, pos=None):
+        x, y = pos if pos is not None else (self.x, self.y)
         pixel_r = self.r * zoom * self.pixels_per_au
         if self.circle:
             canvas.coords(
                 self.circle,
-                self.x - pixel_r, self.y - pixel_r,
-                self.x + pixel_r, self.y + pixel_r
+                x - pixel_r, y - pixel_r,
+                x + pixel_r, y + pixel_r
             )
         else:
             self.circle = canvas.create_oval(
-                self.x - pixel_r, self.y - pixel_r,
-                self.x + pixel_r, self.y + pixel_r,
+                x - pixel_r, y - pixel_r,
+                x + pixel_r, y + pixel_r,
                 fill=self.color
             )
-    def draw_orbit(self, canvas, center_x, center_y, zoom=1.0):
+    def draw_orbit(self, canvas, center_x, center_y, zoom=1.0, parent_pos=None):
         scaled_ro = self.ro * zoom * self.pixels_per_au
 
         if self.parent is None:
             orbit_center_x = center_x
             orbit_center_y = center_y
+        elif parent_pos is not None:
+            orbit_center_x, orbit_center_y = parent_pos
         else:
             orbit_center_x = self.parent.x
             orbit_center_y = self.parent.y
@@ -76,10 +82,11 @@ class CelestialBody:
         )
 
 
-    def draw_label(self, canvas, center_x, center_y, zoom=1.0):
+    def draw_label(self, canvas, center_x, center_y, zoom=1.0, pos=None):
+        x, y = pos if pos is not None else (self.x, self.y)
         pixel_r = self.r * zoom * self.pixels_per_au
-        label_x = self.x + pixel_r + 5
-        label_y = self.y - pixel_r - 5
+        label_x = x + pixel_r + 5
+        label_y = y - pixel_r - 5
 
         if self.label_object:
             canvas.coords(self.label_object, label_x, label_y)
@@ -90,4 +97,46 @@ class CelestialBody:
                 fill="white",
                 font=("Arial", 10),
                 tags="label"
-            )
\ No newline at end of file
+            )
+
+
+def create_solar_system(pixels_per_au, center_x, center_y):
+    """Builds the sun, planets and satellites from config. Returns (sun, planets, satellites)."""
+    # === Sun Initialization ===
+    sun = CelestialBody(
+        name="sun",
+        ro=0,
+        r=config.SUN_RADIUS_AU,
+        speed=0,
+        color="yellow",
+        pixels_per_au=pixels_per_au
+    )
+
+    sun.x = center_x
+    sun.y = center_y
+
+    # === Planet Initialization ===
+    planets = [
+        CelestialBody(**conf, pixels_per_au=pixels_per_au)
+        for conf in config.planet_configs
+    ]
+
+    planet_by_name = {planet.name: planet for planet in planets}
+    planet_by_name["sun"] = sun # In this logic sun is a planet too :)
+
+    satellites = []
+    for i, conf in enumerate(config.satellite_configs):
+        parent = planet_by_name.get(conf["parent"]) if conf["parent"] else None
+        # Assign a default name if not provided, ensuring uniqueness
+        default_name = f"sat_{i+1}"
+        sat_name = conf.get("name", default_name)
+
+        sat = CelestialBody(
+            name=sat_name, # Use provided or default name
+            parent=parent,
+            pixels_per_au=pixels_per_au,
+            **{k: conf[k] for k in ("ro", "r", "speed", "color")}
+            )
+        satellites.append(sat)
+
+    return sun, planets, satellites
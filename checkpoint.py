@@ -0,0 +1,188 @@
+# checkpoint.py
+"""Binary checkpoints of the full simulation state.
+
+Layout (little-endian, all offsets implicit):
+
+    header   magic "SSCK", version u16, n_bodies u16, n_satellites u16,
+             pixels_per_au f64, center_x f64, center_y f64
+    clock    tick u64, sim_datetime i64 (microseconds since 0001-01-01)
+    view     zoom f64, speed_factor f64 (both change positions / sim_dt)
+    counters data_counter u32, last_generation_hour i8, seed u64
+    rng      624 MT words u32 * 625 (624 + position), has_gauss u8, gauss f64
+    bodies   (angle, x, y) f64 * 3 per body
+    packets  count u32, then per packet:
+             id u32, x f64, y f64, current u16, target i16 (-1 = none),
+             timestamp i64, visited bitset (one bit per satellite index)
+
+Satellites are stored by index, so restoring needs the same body
+configuration (order and count) as the run that wrote the checkpoint.
+Positions are in canvas pixels, so it also needs the same scale and centre.
+"""
+import os
+import random
+import struct
+from datetime import datetime, timedelta
+
+MAGIC = b"SSCK"
+VERSION = 4
+
+_EPOCH = datetime(1, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+_HEADER = struct.Struct("<4sHHH")
+_GEOMETRY = struct.Struct("<ddd")
+_CLOCK = struct.Struct("<Qq")
+_VIEW = struct.Struct("<dd")
+_COUNTERS = struct.Struct("<IbQ")
+_RNG_STATE = struct.Struct("<625I")
+_GAUSS = struct.Struct("<Bd")
+_BODY = struct.Struct("<3d")
+_COUNT32 = struct.Struct("<I")
+_PACKET = struct.Struct("<IddHhq")
+
+
+class CheckpointError(Exception):
+    pass
+
+
+def _to_micros(dt):
+    return (dt - _EPOCH) // _MICROSECOND
+
+
+def _from_micros(micros):
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def _geometry(bodies, center_x, center_y):
+    return (bodies[0].pixels_per_au if bodies else 0.0, float(center_x), float(center_y))
+
+
+def save_checkpoint(path, engine, bodies, tick=0, zoom=1.0, speed_factor=1.0, center_x=0, center_y=0):
+    """Writes engine + body state to path atomically (temp file + rename)."""
+    satellites = engine.satellites
+    sat_index = {id(sat): i for i, sat in enumerate(satellites)}
+    bitset_len = (len(satellites) + 7) // 8
+
+    parts = [
+        _HEADER.pack(MAGIC, VERSION, len(bodies), len(satellites)),
+        _GEOMETRY.pack(*_geometry(bodies, center_x, center_y)),
+        _CLOCK.pack(tick, _to_micros(engine.sim_datetime)),
+        _VIEW.pack(zoom, speed_factor),
+        _COUNTERS.pack(engine.data_counter, engine.last_generation_hour, engine.seed),
+    ]
+
+    _, mt_state, gauss_next = engine.rng.getstate()
+    parts.append(_RNG_STATE.pack(*mt_state))
+    parts.append(_GAUSS.pack(gauss_next is not None, gauss_next or 0.0))
+
+    for body in bodies:
+        parts.append(_BODY.pack(body.angle, body.x, body.y))
+
+    parts.append(_COUNT32.pack(len(engine.data_objects)))
+    for data in engine.data_objects:
+        target = data["target"]
+        parts.append(_PACKET.pack(
+            data["id"], data["x"], data["y"],
+            sat_index[id(data["current"])],
+            sat_index[id(target)] if target is not None else -1,
+            _to_micros(data["timestamp"]),
+        ))
+        parts.append(data["visited"].to_bytes(bitset_len, "little"))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(parts))
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, engine, bodies, seed=None, center_x=0, center_y=0):
+    """Restores state written by save_checkpoint() into engine and bodies.
+
+    If seed is given, a checkpoint written with another seed is rejected, as
+    is one written with another pixels_per_au or centre.
+    Raises CheckpointError without touching engine or bodies if the file
+    can't be used. Returns (tick, zoom, speed_factor) stored in the checkpoint;
+    packet and body positions are only valid at that zoom.
+    """
+    with open(path, "rb") as f:
+        buf = f.read()
+
+    satellites = engine.satellites
+    bitset_len = (len(satellites) + 7) // 8
+    offset = 0
+
+    def read(fmt):
+        nonlocal offset
+        values = fmt.unpack_from(buf, offset)
+        offset += fmt.size
+        return values
+
+    try:
+        magic, version, n_bodies, n_satellites = read(_HEADER)
+        if magic != MAGIC or version != VERSION:
+            raise CheckpointError(f"{path}: not a version {VERSION} checkpoint")
+        if n_bodies != len(bodies) or n_satellites != len(satellites):
+            raise CheckpointError(
+                f"{path}: saved with {n_bodies} bodies / {n_satellites} satellites, "
+                f"current run has {len(bodies)} / {len(satellites)}"
+            )
+        geometry = read(_GEOMETRY)
+        if geometry != _geometry(bodies, center_x, center_y):
+            raise CheckpointError(
+                "{}: saved with pixels_per_au {:g} centred at ({:g}, {:g}), ".format(path, *geometry)
+                + "current run uses {:g} at ({:g}, {:g})".format(*_geometry(bodies, center_x, center_y))
+            )
+
+        tick, sim_micros = read(_CLOCK)
+        zoom, speed_factor = read(_VIEW)
+        data_counter, last_generation_hour, saved_seed = read(_COUNTERS)
+        if seed is not None and saved_seed != seed:
+            raise CheckpointError(f"{path}: saved with seed {saved_seed}, this run uses seed {seed}")
+        mt_state = read(_RNG_STATE)
+        has_gauss, gauss = read(_GAUSS)
+        # Validated on a scratch RNG so a bad state never reaches engine.rng
+        rng = random.Random()
+        rng.setstate((3, mt_state, gauss if has_gauss else None))
+        sim_datetime = _from_micros(sim_micros)
+        body_states = [read(_BODY) for _ in range(n_bodies)]
+
+        (n_packets,) = read(_COUNT32)
+        data_objects = []
+        for _ in range(n_packets):
+            data_id, x, y, current, target, timestamp = read(_PACKET)
+            if current >= n_satellites or not -1 <= target < n_satellites:
+                raise CheckpointError(f"{path}: packet {data_id} refers to a satellite out of range")
+            visited = int.from_bytes(buf[offset:offset + bitset_len], "little")
+            offset += bitset_len
+            data_objects.append({
+                "id": data_id,
+                "x": x,
+                "y": y,
+                "current": satellites[current],
+                "target": satellites[target] if target >= 0 else None,
+                "visited": visited,
+                "timestamp": _from_micros(timestamp),
+            })
+        if offset != len(buf):
+            raise CheckpointError(f"{path}: size mismatch, file is corrupt")
+    except struct.error as e:
+        raise CheckpointError(f"{path}: truncated checkpoint") from e
+    except (IndexError, ValueError, OverflowError) as e:
+        # Right size but bad values, e.g. an invalid RNG state or timestamp
+        raise CheckpointError(f"{path}: corrupt checkpoint ({e})") from e
+
+    # Everything parsed, only now touch the live objects
+    engine.sim_datetime = sim_datetime
+    engine.data_counter = data_counter
+    engine.last_generation_hour = last_generation_hour
+    engine.seed = saved_seed
+    engine.rng = rng
+    engine.data_objects = data_objects
+    engine.mst_edges = []
+
+    for body, (angle, x, y) in zip(bodies, body_states):
+        body.angle = angle
+        body.x = x
+        body.y = y
+
+    return tick, zoom, speed_factor
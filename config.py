@@ -8,6 +8,31 @@ SIM_SPEED = 1_000_000  # 1000000 times faster than real time
 SIM_START_DATE = datetime(2161, 5, 19)
 FPS = 120
 DT = 1 / FPS # Base time step, might not be directly used if sim_dt is calculated from real time
+SIM_TICK_RATE = 120 # Fixed simulation ticks per real second (worker thread)
+SIM_TICK_DT = 1 / SIM_TICK_RATE # Real seconds per tick; each tick advances SIM_TICK_DT * SIM_SPEED sim-seconds
+SIM_MAX_LAG = 0.25 # Real seconds the simulation may fall behind before it stops trying to catch up
+FRAME_TIME_SMOOTHING = 0.2 # EMA weight of the newest measured frame time in the frame pacer
+
+# === REPRODUCIBILITY / CHECKPOINTS ===
+SIM_SEED = None # Integer in [0, 2**64) for reproducible runs, None picks a random seed (logged at start)
+CHECKPOINT_FILE = "checkpoint.bin"
+HEADLESS_CHECKPOINT_FILE = "checkpoint_headless.bin" # headless.py uses its own canvas size, so its own file
+CHECKPOINT_EVERY_TICKS = 120 * 60 # Autosave every ~minute of real time, 0 disables
+RESUME_FROM_CHECKPOINT = True # Continue from CHECKPOINT_FILE at startup if it exists and is usable
+                              # (same format, bodies and canvas geometry, and same seed when SIM_SEED is set)
+
+# === PACKET TRACING ===
+TRACE_SAMPLE_RATE = 0.05 # Fraction of packets whose hops/moves are traced (0 disables)
+TRACE_CAPACITY = 65536 # Records kept in the in-memory ring buffer, oldest are overwritten
+TRACE_FILE = "trace.txt" # Written on demand ('t' key)
+
+# === STATE STREAMING ===
+STREAM_ENABLED = False # Also stream from the GUI app (headless.py always streams)
+STREAM_HOST = "127.0.0.1"
+STREAM_PORT = 8765
+STREAM_CLIENT_QUEUE = 8 # Frames buffered per viewer before it starts dropping
+HEADLESS_CANVAS_WIDTH = 1820 # Virtual canvas for headless runs; viewers get coordinates in these pixels
+HEADLESS_CANVAS_HEIGHT = 980
 
 # === PHYSICS / UNITS ===
 EARTH_ORBITAL_SPEED = 2 * pi / SECONDS_IN_YEAR  # rad/sec (in simulation time)
@@ -3,14 +3,15 @@ import random
 import math
 from mst import find_mst, intersects_circle
 from datetime import datetime, timedelta
+import tracer
+import config
 class SimulationEngine:
-    def __init__(self, satellites, canvas, object_speed=3, obstacles=None, center_x=0, center_y=0, sim_start_date=None):
+    def __init__(self, satellites, canvas, object_speed=3, obstacles=None, center_x=0, center_y=0, sim_start_date=None, seed=None):
         self.satellites = satellites
         self.canvas = canvas
         self.data_objects = []
         self.object_speed = object_speed # Base speed in AU/sim_sec
         self.obstacles = obstacles or []
-        self.id_colors = {}
         self.center_x = center_x
         self.center_y = center_y
         self.sim_datetime = sim_start_date
@@ -21,16 +22,27 @@ class SimulationEngine:
         self.data_counter = 0 # Ensure counter starts at 0
         self.log_manager = None
         self.last_generation_hour = -1 # Initialize to -1 to trigger generation on first hour
-        self.tracked_packet_ids = set() # Set to store IDs we want to debug
-        self.max_tracked_packets = 5    # Limit the number of packets to track
+        # Binary ring buffer of events for sampled packets, formatted only on dump
+        self.tracer = tracer.PacketTracer(capacity=config.TRACE_CAPACITY, sample_rate=config.TRACE_SAMPLE_RATE)
+        self._sat_index = {id(sat): i for i, sat in enumerate(satellites)}
+        self.mst_edges = [] # MST computed during the last move_data() call
+        # All simulation randomness comes from this RNG, so a seed reproduces a run.
+        # Checkpoints store the seed as u64, so anything else could not be saved.
+        if seed is not None and not 0 <= seed < 2**64:
+            raise ValueError(f"seed must be in [0, 2**64), got {seed}")
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
 
 
     def _get_color_for_id(self, data_id):
-        if data_id not in self.id_colors:
-            #random color generation in format #RRGGBB
-            color = "#{:06x}".format(random.randint(0, 0xFFFFFF))
-            self.id_colors[data_id] = color
-        return self.id_colors[data_id]
+        # Pseudo-random #RRGGBB derived from the id and seed, so no per-id table is kept.
+        # Kept off self.rng: drawing must not change the simulation
+        return "#{:06x}".format((((data_id ^ self.seed) * 2654435761) >> 8) & 0xFFFFFF)
+
+    def _is_unvisited(self, data, sat):
+        # data["visited"] is a bitset: bit i set = self.satellites[i] already visited
+        index = self._sat_index.get(id(sat))
+        return index is not None and not data["visited"] >> index & 1
 
     def generate_data(self, dt):
         # Generate data once per simulation hour
@@ -40,17 +52,15 @@ class SimulationEngine:
         current_hour = self.sim_datetime.hour
         if current_hour != self.last_generation_hour:
             # Hour has changed, generate one packet from a random satellite
-            sat = random.choice(self.satellites)
+            sat = self.rng.choice(self.satellites)
             
             self.data_counter += 1 # Increment counter ONLY when generating
             data_id = self.data_counter
             generation_time = self.sim_datetime # Capture generation time
 
-            # --- Track first few packet IDs --- 
-            if len(self.tracked_packet_ids) < self.max_tracked_packets:
-                self.tracked_packet_ids.add(data_id)
-                print(f"[DEBUG] Now tracking packet ID: {data_id}\n") # Log which IDs are tracked
-            # ----------------------------------
+            if self.tracer.is_sampled(data_id):
+                self.tracer.record(tracer.GENERATED, data_id, generation_time, sat.x, sat.y,
+                                   sat=self._sat_index[id(sat)])
 
             data = {
                 "id": data_id, # Use the counter as the primary ID
@@ -58,7 +68,7 @@ class SimulationEngine:
                 "y": sat.y,
                 "current": sat,
                 "target": None,
-                "visited": {id(sat)},
+                "visited": 1 << self._sat_index[id(sat)],
                 "timestamp": generation_time # Store generation/departure time
             }
             self.data_objects.append(data)
@@ -73,6 +83,7 @@ class SimulationEngine:
             
     def move_data(self, zoom, sim_dt): # Add sim_dt parameter
         mst_edges = find_mst(self.satellites, self.obstacles, zoom) # Pass zoom to find_mst as well
+        self.mst_edges = mst_edges # Kept so snapshots can reuse it instead of recomputing
         to_remove = []
 
         for data in self.data_objects:
@@ -93,12 +104,12 @@ class SimulationEngine:
                 # Filter neighbors: must be a satellite and not visited
                 valid_neighbors = [
                     neighbor for neighbor in potential_neighbors
-                    if neighbor in self.satellites and id(neighbor) not in data["visited"]
+                    if self._is_unvisited(data, neighbor)
                 ]
 
                 target = None # Initialize target
                 while valid_neighbors: # Loop until we find an unblocked neighbor or run out
-                    potential_target = random.choice(valid_neighbors)
+                    potential_target = self.rng.choice(valid_neighbors)
                     path_blocked = False
                     for obs in self.obstacles:
                         # Use current positions for the immediate path check
@@ -116,14 +127,20 @@ class SimulationEngine:
 
                 if target: # Proceed only if an unblocked target was found
                     data["target"] = target
+                    if self.tracer.is_sampled(data["id"]):
+                        self.tracer.record(tracer.HOP, data["id"], self.sim_datetime, data["x"], data["y"],
+                                           sat=self._sat_index[id(current_sat)], other=self._sat_index[id(target)])
                 else:
                     # No valid/unblocked neighbors found
-                    if not any(neighbor in self.satellites and id(neighbor) not in data["visited"] for neighbor in potential_neighbors):
+                    if not any(self._is_unvisited(data, neighbor) for neighbor in potential_neighbors):
                          # print(f"DEBUG ENGINE: Data [{data['id']}] at [{data['current'].name}] has no valid neighbors left. Marking for removal.") # Commented log
                          pass # Keep the logic, just comment the print
                     else:
                          # print(f"DEBUG ENGINE: Data [{data['id']}] at [{data['current'].name}] had neighbors, but all immediate paths were blocked. Marking for removal.") # Commented log
                          pass # Keep the logic, just comment the print
+                    if self.tracer.is_sampled(data["id"]):
+                        self.tracer.record(tracer.DROPPED, data["id"], self.sim_datetime, data["x"], data["y"],
+                                           sat=self._sat_index[id(current_sat)])
                     to_remove.append(data)
                     continue
 
@@ -142,12 +159,10 @@ class SimulationEngine:
                 # Calculate distance to move in this frame based on sim_dt
                 distance_this_step = self.object_speed * sim_dt
 
-                # --- Conditional Detailed Debug Log --- 
-                if data['id'] in self.tracked_packet_ids: # Only print for tracked IDs
-                    print(f"[MOVE DEBUG] SimTime: {self.sim_datetime.strftime('%Y-%m-%d %H:%M:%S')}, sim_dt: {sim_dt:.4f}, PktID: {data['id']}, "
-                          f"Current: ({data['x']:.3f},{data['y']:.3f}), Target: {target_satellite.name}({tx:.3f},{ty:.3f}), " # Log target name and current coords
-                          f"Dist: {dist:.4f}, BaseSpeed: {self.object_speed:.5f}, StepDist: {distance_this_step:.6f}\n", flush=True)
-                # ------------------------------------
+                sampled = self.tracer.is_sampled(data["id"])
+                if sampled:
+                    self.tracer.record(tracer.MOVE, data["id"], self.sim_datetime, data["x"], data["y"],
+                                       sat=self._sat_index[id(target_satellite)], value=dist)
 
                 if dist > distance_this_step: # Check if distance to target is greater than movement this frame
                     # Calculate the next potential position towards the static target point
@@ -169,6 +184,10 @@ class SimulationEngine:
 
                     if collision_detected:
                         to_remove.append(data) # Mark for removal if collision detected
+                        if sampled:
+                            self.tracer.record(tracer.DROPPED, data["id"], self.sim_datetime, data["x"], data["y"],
+                                               sat=self._sat_index[id(data["current"])],
+                                               other=self._sat_index[id(target_satellite)])
                         # Clear target info so it doesn't try to move further this frame
                         data["target"] = None
                         continue # Skip to the next data object
@@ -193,14 +212,16 @@ class SimulationEngine:
 
                     # print(f"DEBUG ENGINE: Data [{data['id']}] arriving at TARGET POSITION for [{data['target'].name}] from [{data['current'].name}]") # Commented log
                     data["x"], data["y"] = tx, ty # Snap to target position
-                    data["visited"].add(id(data["target"]))
+                    data["visited"] |= 1 << self._sat_index[id(destination)]
                     data["current"] = data["target"]
                     data["timestamp"] = arrival_time # Update timestamp for next hop BEFORE clearing target
                     # print(f"DEBUG ENGINE: Data [{data['id']}] new current is [{data['current'].name}]") # Commented log
                     data["target"] = None
 
-                    if data['id'] in self.tracked_packet_ids: # Log arrival for tracked packets
-                         print(f"[MOVE DEBUG] PktID: {packet_id} ARRIVED at {destination.name} ({tx:.3f},{ty:.3f}) from {source.name}. TravelTime: {travel_time.total_seconds():.2f}s", flush=True) # Log arrival coords
+                    if sampled:
+                        self.tracer.record(tracer.ARRIVED, packet_id, arrival_time, tx, ty,
+                                           sat=self._sat_index[id(destination)], other=self._sat_index[id(source)],
+                                           value=travel_time.total_seconds())
 
 
         # Remove data packets marked for removal
@@ -208,18 +229,25 @@ class SimulationEngine:
             # print(f"DEBUG ENGINE: Removing data [{d['id']}] finally.") # Commented log
             self.data_objects.remove(d)
 
-    def draw_data(self):
+    def packet_states(self):
+        # Immutable (id, x, y) view of the packets, safe to hand over to another thread
+        return tuple((data["id"], data["x"], data["y"]) for data in self.data_objects)
+
+    def draw_data(self, packets=None):
+        # packets: iterable of (id, x, y); defaults to the engine's own live packets
+        if packets is None:
+            packets = self.packet_states()
         self.canvas.delete("data_object")
-        for data in self.data_objects:
-            color = self._get_color_for_id(data["id"])
+        for data_id, x, y in packets:
+            color = self._get_color_for_id(data_id)
             self.canvas.create_rectangle(
-                data["x"] - 2, data["y"] - 2,
-                data["x"] + 2, data["y"] + 2,
+                x - 2, y - 2,
+                x + 2, y + 2,
                 fill=color, tags="data_object"
             )
 
-    def update(self, dt, zoom):
+    def step(self, dt, zoom):
+        # Advance the simulation by dt sim-seconds without touching the canvas
         self.generate_data(dt)
         self.move_data(zoom, dt) # Pass sim_dt (dt) here
-        self.draw_data()
         self.sim_datetime += timedelta(seconds=dt)
\ No newline at end of file
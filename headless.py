@@ -0,0 +1,68 @@
+# headless.py
+# Runs the simulation without a window and streams its state to remote viewers
+# (see stream_server.py for the wire format). Stop with Ctrl+C.
+
+import sys
+import time
+import config
+from bodies import create_solar_system
+from engine import SimulationEngine
+from sim_thread import SimulationThread
+from stream_server import StateStreamServer
+
+
+MARGIN = 50
+CENTER_X = config.HEADLESS_CANVAS_WIDTH // 2
+CENTER_Y = config.HEADLESS_CANVAS_HEIGHT // 2
+PIXELS_PER_AU = (config.HEADLESS_CANVAS_WIDTH / 2 - MARGIN) / config.ro_max
+
+
+def main():
+    sun, planets, satellites = create_solar_system(PIXELS_PER_AU, CENTER_X, CENTER_Y)
+    engine = SimulationEngine(
+        satellites,
+        None, # No canvas: nothing is drawn locally
+        object_speed=config.EFFECTIVE_DATA_SPEED,
+        obstacles=planets + [sun],
+        center_x=CENTER_X,
+        center_y=CENTER_Y,
+        sim_start_date=config.SIM_START_DATE,
+        seed=config.SIM_SEED
+    )
+
+    bodies = [sun] + planets + satellites
+    sim_thread = SimulationThread(engine, bodies, CENTER_X, CENTER_Y, zoom=config.INITIAL_ZOOM_SCALE,
+                                  checkpoint_file=config.HEADLESS_CHECKPOINT_FILE)
+    if config.RESUME_FROM_CHECKPOINT:
+        resume_message = sim_thread.resume(seed=config.SIM_SEED)
+        if resume_message:
+            print(resume_message)
+
+    try:
+        server = StateStreamServer(bodies).start()
+    except OSError as e:
+        sys.exit(f"Cannot stream on {config.STREAM_HOST}:{config.STREAM_PORT}: {e}")
+    sim_thread.listeners.append(server.publish)
+    print(f"Seed: {engine.seed}")
+    print(f"Streaming state on {server.host}:{server.port}")
+
+    sim_thread.start()
+    try:
+        while sim_thread.is_alive():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim_thread.stop()
+        sim_thread.join(timeout=1.0)
+        if sim_thread.error is None:
+            sim_thread.save_checkpoint()
+        server.stop()
+
+    if sim_thread.error is not None:
+        # State may be half-way through a tick, so it is not checkpointed
+        sys.exit(f"Simulation stopped: {sim_thread.error!r}")
+
+
+if __name__ == "__main__":
+    main()
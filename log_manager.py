@@ -1,31 +1,34 @@
 import datetime
+from collections import deque
+import threading
 
 class LogManager:
-    def __init__(self, canvas, width, height, max_lines=7, font=("Consolas", 10)):
+    def __init__(self, canvas, width, height, max_lines=7, font=("Consolas", 10), logfile_path="log.txt"):
         self.canvas = canvas
         self.width = width
         self.height = height
         self.max_lines = max_lines
         self.font = font
-        self.messages = []
+        self.messages = deque(maxlen=max_lines) # Fixed ring: oldest line drops out on append
         self.text_ids = []
+        # log() is called from the simulation thread, draw() from the Tk thread
+        self._lock = threading.Lock()
 
         # Файл для логов
-        self.logfile = open("log.txt", "a", encoding="utf-8")
+        self.logfile = open(logfile_path, "a", encoding="utf-8")
 
     def log(self, message: str, timestamp=None):
         if timestamp is None:
             timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         entry = f"[{timestamp}] {message}"
 
-        # В лог-файл
-        self.logfile.write(entry + "\n")
-        self.logfile.flush()
+        with self._lock:
+            # В лог-файл
+            self.logfile.write(entry + "\n")
+            self.logfile.flush()
 
-        # В экранный лог
-        self.messages.append(entry)
-        if len(self.messages) > self.max_lines:
-            self.messages = self.messages[-self.max_lines:]
+            # В экранный лог
+            self.messages.append(entry)
 
     def draw(self):
         # Очистка предыдущих надписей
@@ -37,7 +40,10 @@ class LogManager:
         padding = 10
         line_height = 16
 
-        for i, msg in enumerate(reversed(self.messages)):
+        with self._lock:
+            messages = list(self.messages)
+
+        for i, msg in enumerate(reversed(messages)):
             y = self.height - padding - i * line_height
             tid = self.canvas.create_text(
                 padding,
@@ -51,4 +57,5 @@ class LogManager:
             self.text_ids.append(tid)
 
     def close(self):
-        self.logfile.close()
+        with self._lock:
+            self.logfile.close()
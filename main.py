@@ -1,23 +1,25 @@
 # The speed is increased to 1m times, but data speed (light speed) slowed down to 20 times
 
 import tkinter as tk
-from bodies import CelestialBody
+from bodies import create_solar_system
 from engine import SimulationEngine
-from mst import update_mst
+from mst import draw_mst
 from datetime import datetime
 from math import pi
+import threading
 import time
 from log_manager import LogManager
+from sim_thread import SimulationThread, FramePacer
+from stream_server import StateStreamServer
 import config
 
 
-last_real_time = time.time()
-
 # === TIME ===
 # Moved to config.py
 
 
 # --- Simulation Control State ---
+# Mirrored into sim_thread, which owns the actual simulation loop
 is_paused = False
 sim_speed_factor = 1.0 # 1.0 for normal, 0.1 for slow, 0.01 for very slow
 # ------------------------------
@@ -47,44 +49,8 @@ canvas = tk.Canvas(root, width=WIDTH, height=HEIGHT, bg="black")
 canvas.pack()
 
 
-# === Sun Initialization ===
-sun = CelestialBody(
-    name="sun",
-    ro=0,
-    r=config.SUN_RADIUS_AU,
-    speed=0,
-    color="yellow",
-    pixels_per_au=PIXELS_PER_AU
-)
-
-sun.x = CENTER_X
-sun.y = CENTER_Y
-
-# === Planet Initialization ===
-# planet_configs = [...]
-planets = [
-    CelestialBody(**conf, pixels_per_au=PIXELS_PER_AU)
-    for conf in config.planet_configs
-]
-
-# satellite_configs = [...]
-planet_by_name = {planet.name: planet for planet in planets}
-planet_by_name["sun"] = sun # In this logic sun is a planet too :)
-
-satellites = []
-for i, conf in enumerate(config.satellite_configs):
-    parent = planet_by_name.get(conf["parent"]) if conf["parent"] else None
-    # Assign a default name if not provided, ensuring uniqueness
-    default_name = f"sat_{i+1}"
-    sat_name = conf.get("name", default_name)
-    
-    sat = CelestialBody(
-        name=sat_name, # Use provided or default name
-        parent=parent,
-        pixels_per_au=PIXELS_PER_AU,
-        **{k: conf[k] for k in ("ro", "r", "speed", "color") if k != 'name'} # Exclude name from kwargs
-        )
-    satellites.append(sat)
+# === Bodies Initialization ===
+sun, planets, satellites = create_solar_system(PIXELS_PER_AU, CENTER_X, CENTER_Y)
 
 # === Logging simulation start ===
 log_manager = LogManager(canvas, WIDTH, HEIGHT, max_lines=10)
@@ -95,52 +61,47 @@ log_manager.log("="*50)
 log_manager.log(f"Sim time: {sim_time_str}")
 log_manager.log(f"Press 'P' to pause/resume, 'S' to cycle speed (1x / 0.1x / 0.01x)")
 
-def update():
-    # Real time
-    global last_real_time
-    now = time.time()
-    real_dt = now - last_real_time
-    last_real_time = now
+def render():
+    # Draws the latest snapshot published by the simulation thread.
+    # The simulation never waits for this function; slow frames just skip ticks.
+    global last_rendered_tick, error_reported
+    frame_start = time.perf_counter()
 
-    # --- Pause Check --- 
-    if is_paused:
-        if root.winfo_exists():
-            # Use constant delay even when paused to keep GUI responsive
-            root.after(int(config.DT * 1000), update) 
-        return
-    # ---------------------
+    if sim_thread.error is not None and not error_reported:
+        error_reported = True
+        log_manager.log(f"Simulation stopped: {sim_thread.error!r}")
+        log_manager.draw()
 
-    # --- Effective Speed Calculation ---
-    effective_sim_speed = config.SIM_SPEED * sim_speed_factor
-    # -----------------------------------
+    snapshot = sim_thread.latest_snapshot()
+    if snapshot.tick != last_rendered_tick:
+        last_rendered_tick = snapshot.tick
+        draw_snapshot(snapshot)
+        pacer.frame_done(time.perf_counter() - frame_start)
 
-    sim_dt = real_dt * effective_sim_speed
-    engine.update(sim_dt, zoom_scale)
+    if root.winfo_exists():
+        root.after(pacer.next_delay_ms(), render)
 
-    sun.update_position(CENTER_X, CENTER_Y, sim_dt, zoom=zoom_scale)
-    sun.draw(canvas, CENTER_X, CENTER_Y, zoom=zoom_scale)
 
-    for planet in planets:
-        planet.update_position(CENTER_X, CENTER_Y, sim_dt, zoom=zoom_scale)
-        planet.draw(canvas, CENTER_X, CENTER_Y, zoom=zoom_scale)
+def draw_snapshot(snapshot):
+    # Radii must use the zoom the positions were computed with, not the live zoom_scale
+    positions = snapshot.bodies
+    zoom = snapshot.zoom
 
-    for sat in satellites:
-        sat.update_position(CENTER_X, CENTER_Y, sim_dt, zoom=zoom_scale)
-        sat.draw(canvas, CENTER_X, CENTER_Y, zoom=zoom_scale)
+    for body in bodies:
+        body.draw(canvas, CENTER_X, CENTER_Y, zoom=zoom, pos=positions[body_index[id(body)]])
 
     canvas.delete("orbit")
     if show_orbits:
-        for planet in planets:
-            planet.draw_orbit(canvas, CENTER_X, CENTER_Y, zoom=zoom_scale)
-        for sat in satellites:
-            sat.draw_orbit(canvas, CENTER_X, CENTER_Y, zoom=zoom_scale)
+        for body in planets + satellites:
+            parent_pos = positions[body_index[id(body.parent)]] if body.parent else None
+            body.draw_orbit(canvas, CENTER_X, CENTER_Y, zoom=zoom, parent_pos=parent_pos)
 
     if show_labels:
         for body in planets + satellites:
-            body.draw_label(canvas, CENTER_X, CENTER_Y, zoom=zoom_scale)
+            body.draw_label(canvas, CENTER_X, CENTER_Y, zoom=zoom, pos=positions[body_index[id(body)]])
 
     # === SIMULATION DATE ===
-    date_text = engine.sim_datetime.strftime("%Y-%m-%d %H:%M:%S")
+    date_text = snapshot.sim_datetime.strftime("%Y-%m-%d %H:%M:%S")
 
     global date_label
     if date_label is None:
@@ -156,11 +117,9 @@ def update():
         canvas.itemconfigure(date_label, text=date_text)
 
     log_manager.draw()
-    update_mst(canvas, satellites, planets + [sun], zoom=zoom_scale, center_x=CENTER_X, center_y=CENTER_Y)
 
-    if root.winfo_exists():
-        # Always schedule the next update using the base DT for consistent FPS
-        root.after(int(config.DT * 1000), update) 
+    draw_mst(canvas, (positions[i] + positions[j] for i, j in snapshot.mst_edges))
+    engine.draw_data(snapshot.packets)
 
 
 engine = SimulationEngine(
@@ -170,10 +129,34 @@ engine = SimulationEngine(
     obstacles=planets + [sun],
     center_x=CENTER_X,
     center_y=CENTER_Y,
-    sim_start_date=config.SIM_START_DATE
+    sim_start_date=config.SIM_START_DATE,
+    seed=config.SIM_SEED
 )
 engine.log_manager = log_manager
 
+# Parents first: sun -> planets -> satellites
+bodies = [sun] + planets + satellites
+body_index = {id(body): i for i, body in enumerate(bodies)}
+
+sim_thread = SimulationThread(engine, bodies, CENTER_X, CENTER_Y, zoom=zoom_scale)
+if config.RESUME_FROM_CHECKPOINT:
+    resume_message = sim_thread.resume(seed=config.SIM_SEED)
+    if resume_message:
+        log_manager.log(resume_message, timestamp=engine.sim_datetime)
+    # Saved positions are only valid at the saved zoom, so the GUI follows the checkpoint
+    zoom_scale = sim_thread.zoom
+    sim_speed_factor = sim_thread.speed_factor
+log_manager.log(f"Seed: {engine.seed}")
+
+stream_server = None
+if config.STREAM_ENABLED:
+    stream_server = StateStreamServer(bodies).start()
+    sim_thread.listeners.append(stream_server.publish)
+    log_manager.log(f"Streaming state on {stream_server.host}:{stream_server.port}")
+pacer = FramePacer()
+last_rendered_tick = -1
+error_reported = False
+
 # Bind the "o" key to toggle orbits
 def toggle_orbits(event=None):
     global show_orbits
@@ -192,19 +175,19 @@ def toggle_labels(event=None):
 def zoom_in(event=None):
     global zoom_scale
     zoom_scale *= config.ZOOM_STEP
+    sim_thread.zoom = zoom_scale
 
 def zoom_out(event=None):
     global zoom_scale
     zoom_scale /= config.ZOOM_STEP
+    sim_thread.zoom = zoom_scale
 
 def toggle_pause(event=None):
     global is_paused
     is_paused = not is_paused
+    sim_thread.paused = is_paused
     log_message = "Simulation paused" if is_paused else "Simulation resumed"
     log_manager.log(log_message)
-    if not is_paused:
-        # Schedule the next update immediately upon unpausing
-        root.after(1, update)
 
 def toggle_speed(event=None):
     global sim_speed_factor
@@ -218,17 +201,52 @@ def toggle_speed(event=None):
     else: # Must be 0.01
         sim_speed_factor = 1.0
         log_message = ">> Simulation speed set to Normal (1x)"
+    sim_thread.speed_factor = sim_speed_factor
     log_manager.log(log_message)
 
+def save_checkpoint(event=None):
+    def save():
+        sim_thread.save_checkpoint()
+        log_manager.log(f"Checkpoint saved to {config.CHECKPOINT_FILE}", timestamp=engine.sim_datetime)
+    # Saved on the simulation thread between two ticks so the state is consistent
+    sim_thread.call_between_ticks(save)
+
+def dump_trace(event=None):
+    def write(trace, timestamp):
+        count = trace.dump(config.TRACE_FILE, engine.satellites)
+        log_manager.log(f"Trace: {count} records written to {config.TRACE_FILE}", timestamp=timestamp)
+
+    def capture():
+        # Only the buffer copy happens between ticks; formatting and file I/O
+        # run on a short-lived thread so the simulation doesn't fall behind
+        trace = engine.tracer.copy()
+        threading.Thread(target=write, args=(trace, engine.sim_datetime), name="trace-dump", daemon=True).start()
+
+    # The ring buffer is written by the simulation thread, so copy it there
+    sim_thread.call_between_ticks(capture)
+
+def on_close():
+    sim_thread.stop()
+    sim_thread.join(timeout=1.0)
+    if stream_server:
+        stream_server.stop()
+    log_manager.close()
+    root.destroy()
+
 # Binds
 root.bind("p", toggle_pause)
 root.bind("s", toggle_speed)
 root.bind("o", toggle_orbits)
 root.bind("l", toggle_labels)
+root.bind("c", save_checkpoint)
+root.bind("t", dump_trace)
 root.bind("+", lambda e: zoom_in())
 root.bind("-", lambda e: zoom_out())
 
+root.protocol("WM_DELETE_WINDOW", on_close)
+
 date_label = None
 
-update()
+sim_thread.start()
+render()
 root.mainloop()
\ No newline at end of file
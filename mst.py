@@ -86,12 +86,11 @@ def find_mst(satellites: list[CelestialBody], obstacles: list[CelestialBody], zo
 
     return mst_edges
 
-def update_mst(canvas, satellites: list[CelestialBody], obstacles: list[CelestialBody], zoom=1.0, center_x=0, center_y=0):
+def draw_mst(canvas, segments):
+    """Рисует рёбра MST; segments - итерируемое (x1, y1, x2, y2)."""
     canvas.delete("mst_edge")
-    mst_edges = find_mst(satellites, obstacles, zoom=zoom)
-
-    for sat1, sat2 in mst_edges:
+    for x1, y1, x2, y2 in segments:
         canvas.create_line(
-            sat1.x, sat1.y, sat2.x, sat2.y,
+            x1, y1, x2, y2,
             fill="blue", dash=(4, 2), tags="mst_edge"
         )
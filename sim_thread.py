@@ -0,0 +1,190 @@
+# sim_thread.py
+import os
+import queue
+import threading
+import time
+import traceback
+from typing import NamedTuple
+from datetime import datetime
+from checkpoint import save_checkpoint, load_checkpoint, CheckpointError
+import config
+
+
+class Snapshot(NamedTuple):
+    """Immutable view of the simulation published after every tick."""
+    tick: int
+    sim_datetime: datetime
+    zoom: float
+    bodies: tuple      # (x, y) per body, same order as SimulationThread.bodies
+    mst_edges: tuple   # (i, j) index pairs into bodies (same index space as above)
+    packets: tuple     # (id, x, y) per live packet
+
+
+class SimulationThread(threading.Thread):
+    """Runs the engine at a fixed tick rate, independent of the GUI frame rate.
+
+    Every tick advances the simulation by the same sim_dt, so results do not
+    depend on how fast (or slow) the renderer is. The GUI only reads
+    latest_snapshot() and may change zoom / speed_factor / paused at any time;
+    the new values are picked up at the start of the next tick.
+    """
+
+    def __init__(self, engine, bodies, center_x, center_y, zoom=1.0,
+                 tick_dt=config.SIM_TICK_DT, sim_speed=config.SIM_SPEED, max_lag=config.SIM_MAX_LAG,
+                 checkpoint_file=config.CHECKPOINT_FILE, checkpoint_every=config.CHECKPOINT_EVERY_TICKS):
+        super().__init__(name="simulation", daemon=True)
+        self.engine = engine
+        self.bodies = bodies # Parents must come before their satellites
+        self.center_x = center_x
+        self.center_y = center_y
+        self.tick_dt = tick_dt
+        self.sim_speed = sim_speed
+        self.max_lag = max_lag
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_every = checkpoint_every
+
+        # Controlled from the GUI thread
+        self.zoom = zoom
+        self.speed_factor = 1.0
+        self.paused = False
+
+        self.tick = 0
+        self.error = None # Exception that stopped run(), for the GUI / headless loop to report
+        self._body_index = {id(body): i for i, body in enumerate(bodies)}
+        self._stop_event = threading.Event()
+        self._pending = queue.SimpleQueue() # Callables to run between ticks
+        self.listeners = [] # Called with every new snapshot on this thread; must not block
+        self._snapshot = self._make_snapshot()
+
+    def _make_snapshot(self, zoom=None):
+        # zoom: the value the tick actually used (self.zoom may have changed since)
+        return Snapshot(
+            tick=self.tick,
+            sim_datetime=self.engine.sim_datetime,
+            zoom=self.zoom if zoom is None else zoom,
+            bodies=tuple((body.x, body.y) for body in self.bodies),
+            mst_edges=tuple(
+                (self._body_index[id(sat1)], self._body_index[id(sat2)])
+                for sat1, sat2 in self.engine.mst_edges
+            ),
+            packets=self.engine.packet_states(),
+        )
+
+    def latest_snapshot(self):
+        # Attribute reads are atomic, the snapshot itself is never mutated
+        return self._snapshot
+
+    def _publish(self, zoom=None):
+        self._snapshot = self._make_snapshot(zoom)
+        for listener in self.listeners:
+            listener(self._snapshot)
+
+    def call_between_ticks(self, func):
+        """Runs func() on the simulation thread before the next tick (even when paused)."""
+        self._pending.put(func)
+
+    def _run_pending(self):
+        while True:
+            try:
+                func = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            func()
+
+    def save_checkpoint(self, path=None):
+        # Only call on the simulation thread, or via call_between_ticks()
+        save_checkpoint(path or self.checkpoint_file, self.engine, self.bodies, tick=self.tick,
+                        zoom=self.zoom, speed_factor=self.speed_factor,
+                        center_x=self.center_x, center_y=self.center_y)
+
+    def load_checkpoint(self, path=None, seed=None):
+        # Only call on the simulation thread, or before start()
+        self.tick, self.zoom, self.speed_factor = load_checkpoint(
+            path or self.checkpoint_file, self.engine, self.bodies, seed=seed,
+            center_x=self.center_x, center_y=self.center_y
+        )
+        self._publish()
+
+    def resume(self, seed=None):
+        """Loads checkpoint_file if it exists. Returns a line for the log, or None.
+
+        A checkpoint that can't be used (corrupt, older format, other body
+        config or canvas geometry, or another seed when seed is given) is
+        ignored and the run starts fresh.
+        """
+        if not os.path.exists(self.checkpoint_file):
+            return None
+        try:
+            self.load_checkpoint(seed=seed)
+        except (CheckpointError, OSError) as e:
+            return f"Checkpoint ignored, starting fresh: {e}"
+        return f"Resumed from {self.checkpoint_file} at tick {self.tick}"
+
+    def step(self):
+        """Advances the simulation by exactly one tick and publishes a snapshot."""
+        sim_dt = self.tick_dt * self.sim_speed * self.speed_factor
+        zoom = self.zoom
+        # Bodies move first so the engine's MST and packets are computed from the
+        # same positions the snapshot publishes (no one-tick lag in drawn edges)
+        for body in self.bodies:
+            body.update_position(self.center_x, self.center_y, sim_dt, zoom=zoom)
+        self.engine.step(sim_dt, zoom)
+        self.tick += 1
+        self._publish(zoom)
+
+        if self.checkpoint_every and self.tick % self.checkpoint_every == 0:
+            self.save_checkpoint()
+
+    def run(self):
+        try:
+            self._tick_loop()
+        except Exception as e:
+            # The thread ends here; keep the error so whoever watches it can report it
+            self.error = e
+            traceback.print_exc()
+
+    def _tick_loop(self):
+        next_tick = time.perf_counter()
+        while not self._stop_event.is_set():
+            self._run_pending()
+            if self.paused:
+                self._stop_event.wait(self.tick_dt)
+                next_tick = time.perf_counter() # Don't try to catch up on paused time
+                continue
+
+            self.step()
+
+            next_tick += self.tick_dt
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            elif -delay > self.max_lag:
+                # Too far behind real time: drop the backlog instead of spiralling.
+                # Ticks are never skipped, so results stay the same, only slower.
+                next_tick = time.perf_counter()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class FramePacer:
+    """Chooses the delay before the next GUI frame from measured frame times.
+
+    Keeps a moving average of how long drawing takes and schedules the next
+    frame so that draw + delay matches the target frame time. When drawing is
+    slower than the budget the delay drops to the minimum and the renderer
+    simply shows the latest snapshot, skipping the ticks in between.
+    """
+
+    def __init__(self, target_fps=config.FPS, smoothing=config.FRAME_TIME_SMOOTHING, min_delay_ms=1):
+        self.frame_budget = 1 / target_fps
+        self.smoothing = smoothing
+        self.min_delay_ms = min_delay_ms
+        self.avg_frame_time = 0.0
+
+    def frame_done(self, frame_time):
+        self.avg_frame_time += self.smoothing * (frame_time - self.avg_frame_time)
+
+    def next_delay_ms(self):
+        delay = self.frame_budget - self.avg_frame_time
+        return max(self.min_delay_ms, int(delay * 1000))
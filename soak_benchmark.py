@@ -0,0 +1,117 @@
+# soak_benchmark.py
+# Runs the simulation headless as fast as possible until a given number of
+# packets has been generated and checks that resident memory stays flat.
+#
+#   python soak_benchmark.py                  # 2 000 000 packets
+#   python soak_benchmark.py --packets 50000  # quick check
+#
+# Exits with status 1 if RSS grows by more than --tolerance-mb after warm-up.
+# Packets are drawn and logged every tick (against a canvas that keeps
+# nothing), so per-id colour and log state is exercised as in the GUI.
+
+import argparse
+import os
+import sys
+import time
+import config
+from bodies import create_solar_system
+from engine import SimulationEngine
+from log_manager import LogManager
+from sim_thread import SimulationThread
+from headless import CENTER_X, CENTER_Y, PIXELS_PER_AU
+
+
+class NullCanvas:
+    """Stands in for tk.Canvas: accepts drawing calls and keeps nothing."""
+
+    def delete(self, *args):
+        pass
+
+    def create_rectangle(self, *args, **kwargs):
+        return 0
+
+    def create_text(self, *args, **kwargs):
+        return 0
+
+
+def current_rss_mb():
+    # /proc gives the current RSS on Linux; elsewhere fall back to the peak,
+    # which is still enough to notice steady growth.
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless memory soak run")
+    parser.add_argument("--packets", type=int, default=2_000_000, help="packets to generate")
+    parser.add_argument("--warmup", type=float, default=0.05, help="fraction of the run before the RSS baseline is taken")
+    parser.add_argument("--tolerance-mb", type=float, default=4.0, help="allowed RSS growth after warm-up")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if args.packets < 1:
+        parser.error("--packets must be at least 1")
+    if not 0 <= args.warmup < 1:
+        parser.error("--warmup must be in [0, 1)")
+    if not 0 <= args.seed < 2**64:
+        parser.error("--seed must be in [0, 2**64)")
+
+    sun, planets, satellites = create_solar_system(PIXELS_PER_AU, CENTER_X, CENTER_Y)
+    canvas = NullCanvas()
+    engine = SimulationEngine(
+        satellites,
+        canvas,
+        object_speed=config.EFFECTIVE_DATA_SPEED,
+        obstacles=planets + [sun],
+        center_x=CENTER_X,
+        center_y=CENTER_Y,
+        sim_start_date=config.SIM_START_DATE,
+        seed=args.seed
+    )
+    engine.log_manager = LogManager(canvas, config.HEADLESS_CANVAS_WIDTH, config.HEADLESS_CANVAS_HEIGHT,
+                                    max_lines=10, logfile_path=os.devnull)
+    # Ticks are driven directly, without real-time pacing or autosaves
+    sim = SimulationThread(engine, [sun] + planets + satellites, CENTER_X, CENTER_Y,
+                           zoom=config.INITIAL_ZOOM_SCALE, checkpoint_every=0)
+
+    warmup_packets = int(args.packets * args.warmup)
+    report_every = max(1, args.packets // 20)
+    baseline = None
+    peak = 0.0
+    next_report = report_every
+    start = time.perf_counter()
+
+    while engine.data_counter < args.packets:
+        sim.step()
+        # What the GUI does per frame: colour every live packet, redraw the log
+        engine.draw_data()
+        engine.log_manager.draw()
+        if baseline is None and engine.data_counter >= warmup_packets:
+            baseline = current_rss_mb()
+        if engine.data_counter >= next_report:
+            next_report += report_every
+            rss = current_rss_mb()
+            if baseline is not None:
+                peak = max(peak, rss)
+            elapsed = time.perf_counter() - start
+            print(f"{engine.data_counter:>10} packets  {sim.tick:>10} ticks  "
+                  f"{len(engine.data_objects):>4} in flight  RSS {rss:8.1f} MB  {elapsed:7.1f}s", flush=True)
+
+    engine.log_manager.close()
+    if baseline is None:
+        sys.exit("Run too short to take an RSS baseline")
+    growth = max(peak, current_rss_mb()) - baseline
+    print(f"RSS after warm-up: {baseline:.1f} MB, growth: {growth:+.2f} MB (tolerance {args.tolerance_mb} MB)")
+    if growth > args.tolerance_mb:
+        print("FAIL: memory is not flat")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+# stream_server.py
+"""Streams simulation state to any number of local viewers over TCP.
+
+Every frame on the wire is a u32 length prefix followed by:
+
+    header   type u8 (0 = keyframe, 1 = delta), tick u64,
+             sim_datetime i64 (microseconds since 0001-01-01), zoom f32
+    table    keyframes only: count u16, then per body
+             parent i16 (-1 = orbits the centre), r f32 (AU),
+             pixels_per_au f32, name length u8, name (utf-8)
+    bodies   count u16, then (index u16, x f32, y f32)   - moved bodies
+    mst      added count u16, (i u16, j u16) * count,
+             removed count u16, (i u16, j u16) * count
+    packets  new count u32, (id u32, x f32, y f32) * count,
+             moved count u32, (id u32, x f32, y f32) * count,
+             removed count u32, id u32 * count
+
+Body indices, in the body records and in MST edges alike, refer to the
+order of the keyframe body table (sun, planets, then satellites). On-screen
+radius of a body is r * pixels_per_au * zoom pixels.
+
+A keyframe is a delta from an empty state. Each client gets a keyframe on
+connect; if its queue is full the frame is dropped and the client is sent
+a keyframe again once it catches up, so slow viewers never stall the
+simulation or each other.
+"""
+import asyncio
+import struct
+import threading
+from datetime import datetime, timedelta
+import config
+
+KEYFRAME = 0
+DELTA = 1
+
+_EPOCH = datetime(1, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+_LENGTH = struct.Struct("<I")
+_HEADER = struct.Struct("<BQqf")
+_BODY_INFO = struct.Struct("<hffB")
+_COUNT16 = struct.Struct("<H")
+_COUNT32 = struct.Struct("<I")
+_BODY = struct.Struct("<Hff")
+_EDGE = struct.Struct("<HH")
+_PACKET = struct.Struct("<Iff")
+_PACKET_ID = struct.Struct("<I")
+
+
+def encode_body_table(bodies):
+    """Static body description sent with every keyframe."""
+    index = {id(body): i for i, body in enumerate(bodies)}
+    parts = [_COUNT16.pack(len(bodies))]
+    for body in bodies:
+        name = body.name.encode("utf-8")[:255]
+        parent = index.get(id(body.parent), -1) if body.parent is not None else -1
+        parts.append(_BODY_INFO.pack(parent, body.r, body.pixels_per_au, len(name)))
+        parts.append(name)
+    return b"".join(parts)
+
+
+def encode_frame(prev, snapshot, body_table=b""):
+    """Encodes the difference between two Snapshots; prev=None gives a keyframe.
+
+    body_table (from encode_body_table) is only included in keyframes.
+    """
+    parts = [_HEADER.pack(
+        KEYFRAME if prev is None else DELTA,
+        snapshot.tick,
+        (snapshot.sim_datetime - _EPOCH) // _MICROSECOND,
+        snapshot.zoom,
+    )]
+    if prev is None:
+        parts.append(body_table or _COUNT16.pack(0))
+
+    prev_bodies = prev.bodies if prev is not None else ()
+    moved_bodies = [
+        (i, x, y) for i, (x, y) in enumerate(snapshot.bodies)
+        if i >= len(prev_bodies) or prev_bodies[i] != (x, y)
+    ]
+    parts.append(_COUNT16.pack(len(moved_bodies)))
+    parts.extend(_BODY.pack(*body) for body in moved_bodies)
+
+    prev_edges = set(prev.mst_edges) if prev is not None else set()
+    edges = set(snapshot.mst_edges)
+    for changed in (edges - prev_edges, prev_edges - edges):
+        parts.append(_COUNT16.pack(len(changed)))
+        parts.extend(_EDGE.pack(i, j) for i, j in sorted(changed))
+
+    prev_packets = {pid: (x, y) for pid, x, y in prev.packets} if prev is not None else {}
+    new, moved = [], []
+    for pid, x, y in snapshot.packets:
+        old = prev_packets.pop(pid, None)
+        if old is None:
+            new.append((pid, x, y))
+        elif old != (x, y):
+            moved.append((pid, x, y))
+    for changed in (new, moved):
+        parts.append(_COUNT32.pack(len(changed)))
+        parts.extend(_PACKET.pack(*packet) for packet in changed)
+    # Whatever is left in prev_packets is gone from the new snapshot
+    parts.append(_COUNT32.pack(len(prev_packets)))
+    parts.extend(_PACKET_ID.pack(pid) for pid in prev_packets)
+
+    payload = b"".join(parts)
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def decode_frame(payload):
+    """Decodes one frame payload (without the length prefix) into a dict."""
+    offset = 0
+
+    def read(fmt):
+        nonlocal offset
+        values = fmt.unpack_from(payload, offset)
+        offset += fmt.size
+        return values
+
+    def read_list(count_fmt, item_fmt):
+        (count,) = read(count_fmt)
+        return [read(item_fmt) for _ in range(count)]
+
+    def read_body_table():
+        nonlocal offset
+        table = []
+        (count,) = read(_COUNT16)
+        for _ in range(count):
+            parent, r, pixels_per_au, name_len = read(_BODY_INFO)
+            name = payload[offset:offset + name_len].decode("utf-8")
+            offset += name_len
+            table.append({"name": name, "parent": parent, "r": r, "pixels_per_au": pixels_per_au})
+        return table
+
+    frame_type, tick, sim_micros, zoom = read(_HEADER)
+    keyframe = frame_type == KEYFRAME
+    return {
+        "keyframe": keyframe,
+        "tick": tick,
+        "sim_datetime": _EPOCH + timedelta(microseconds=sim_micros),
+        "zoom": zoom,
+        "body_table": read_body_table() if keyframe else None,
+        "bodies": read_list(_COUNT16, _BODY),
+        "mst_added": read_list(_COUNT16, _EDGE),
+        "mst_removed": read_list(_COUNT16, _EDGE),
+        "packets_new": read_list(_COUNT32, _PACKET),
+        "packets_moved": read_list(_COUNT32, _PACKET),
+        "packets_removed": [pid for (pid,) in read_list(_COUNT32, _PACKET_ID)],
+    }
+
+
+class StateMirror:
+    """Viewer-side state rebuilt from decoded frames."""
+
+    def __init__(self):
+        self.tick = None
+        self.sim_datetime = None
+        self.zoom = None
+        self.body_table = [] # Names, parents and radii, indexed like bodies
+        self.bodies = {}
+        self.mst_edges = set()
+        self.packets = {}
+
+    def apply(self, frame):
+        if frame["keyframe"]:
+            self.bodies.clear()
+            self.mst_edges.clear()
+            self.packets.clear()
+            self.body_table = frame["body_table"]
+        self.tick = frame["tick"]
+        self.sim_datetime = frame["sim_datetime"]
+        self.zoom = frame["zoom"]
+        for i, x, y in frame["bodies"]:
+            self.bodies[i] = (x, y)
+        self.mst_edges.difference_update(frame["mst_removed"])
+        self.mst_edges.update(frame["mst_added"])
+        for pid in frame["packets_removed"]:
+            self.packets.pop(pid, None)
+        for pid, x, y in frame["packets_new"] + frame["packets_moved"]:
+            self.packets[pid] = (x, y)
+
+
+async def read_frames(reader):
+    """Async generator of decoded frames from a viewer's StreamReader."""
+    while True:
+        try:
+            header = await reader.readexactly(_LENGTH.size)
+        except asyncio.IncompleteReadError:
+            return
+        (length,) = _LENGTH.unpack(header)
+        yield decode_frame(await reader.readexactly(length))
+
+
+class _Client:
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.needs_keyframe = True
+        self.dropped = 0
+        self.task = asyncio.current_task()
+
+
+class StateStreamServer:
+    """Runs an asyncio server on its own thread and fans snapshots out to viewers.
+
+    publish() is meant to be registered in SimulationThread.listeners; it only
+    hands over the snapshot and never waits on the network.
+    """
+
+    def __init__(self, bodies, host=config.STREAM_HOST, port=config.STREAM_PORT, client_queue=config.STREAM_CLIENT_QUEUE):
+        # bodies: same list, in the same order, as SimulationThread.bodies
+        self.body_table = encode_body_table(bodies)
+        self.host = host
+        self.port = port
+        self.client_queue = client_queue
+        self.clients = set()
+
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._start_error = None # Set by _run() if the server could not bind
+        self._latest = None # Newest snapshot handed over by publish()
+        self._last_sent = None # Snapshot the last deltas were computed against
+        self._wakeup_pending = False
+        self._stopped = False
+
+    def start(self):
+        """Starts the server thread; raises the bind error (e.g. port in use) if it failed."""
+        self._thread = threading.Thread(target=self._run, name="stream-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._start_error is not None:
+            self._thread.join()
+            raise self._start_error
+        return self
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port)
+            )
+        except Exception as e:
+            # Handed to start(), which would otherwise wait on _ready forever
+            self._start_error = e
+            self._loop.close()
+            self._loop = None
+            self._ready.set()
+            return
+        # Report the real port when started with port=0
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            tasks = [client.task for client in self.clients]
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+    def stop(self):
+        self._stopped = True # publish() becomes a no-op from here on
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=1.0)
+
+    def publish(self, snapshot):
+        # Runs on the simulation thread. Snapshots published while the loop is
+        # busy are coalesced: only the newest one is diffed and sent.
+        # Listeners may outlive the server (e.g. a last tick after stop()), so
+        # publishing to a stopped or never started server does nothing.
+        self._latest = snapshot
+        if self._stopped or self._loop is None or self._wakeup_pending:
+            return
+        self._wakeup_pending = True
+        try:
+            self._loop.call_soon_threadsafe(self._broadcast)
+        except RuntimeError:
+            pass # Loop closed between the check and the call (stop() racing us)
+
+    def _broadcast(self):
+        self._wakeup_pending = False
+        snapshot = self._latest
+        if snapshot is self._last_sent:
+            return
+        if not self.clients:
+            # Nobody to diff for; new clients start from a keyframe of _last_sent anyway
+            self._last_sent = snapshot
+            return
+
+        delta = encode_frame(self._last_sent, snapshot)
+        keyframe = None
+        self._last_sent = snapshot
+
+        for client in self.clients:
+            if client.queue.full():
+                # Drop instead of blocking; the missing delta is repaired by a keyframe
+                client.dropped += 1
+                client.needs_keyframe = True
+                continue
+            if client.needs_keyframe:
+                if keyframe is None:
+                    keyframe = encode_frame(None, snapshot, self.body_table)
+                client.queue.put_nowait(keyframe)
+                client.needs_keyframe = False
+            else:
+                client.queue.put_nowait(delta)
+
+    async def _handle_client(self, reader, writer):
+        client = _Client(writer, self.client_queue)
+        if self._last_sent is not None:
+            client.queue.put_nowait(encode_frame(None, self._last_sent, self.body_table))
+            client.needs_keyframe = False
+        self.clients.add(client)
+        try:
+            while True:
+                frame = await client.queue.get()
+                writer.write(frame)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        except asyncio.CancelledError:
+            pass # Server shutting down (see _run); ending normally keeps asyncio quiet
+        finally:
+            self.clients.discard(client)
+            writer.close()
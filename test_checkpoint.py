@@ -0,0 +1,133 @@
+# test_checkpoint.py
+import struct
+import pytest
+import config
+from bodies import create_solar_system
+from checkpoint import CheckpointError, _HEADER, _GEOMETRY, _CLOCK, _VIEW, _COUNTERS
+from engine import SimulationEngine
+from sim_thread import SimulationThread
+
+
+def build(seed=7, pixels_per_au=30, center_x=500, center_y=400):
+    sun, planets, satellites = create_solar_system(pixels_per_au, center_x, center_y)
+    engine = SimulationEngine(
+        satellites,
+        None,
+        object_speed=config.EFFECTIVE_DATA_SPEED,
+        obstacles=planets + [sun],
+        sim_start_date=config.SIM_START_DATE,
+        seed=seed
+    )
+    sim = SimulationThread(engine, [sun] + planets + satellites, center_x, center_y, zoom=2.0, checkpoint_every=0)
+    sim.speed_factor = 0.01 # Slow enough for packets to spend several ticks in flight
+    return sim
+
+
+def test_resume_matches_uninterrupted_run(tmp_path):
+    path = tmp_path / "checkpoint.bin"
+    ticks = 2000
+
+    uninterrupted = build()
+    for _ in range(ticks):
+        uninterrupted.step()
+
+    first_half = build()
+    for _ in range(ticks // 2):
+        first_half.step()
+    first_half.save_checkpoint(str(path))
+
+    resumed = build(seed=99)
+    resumed.load_checkpoint(str(path))
+    for _ in range(ticks // 2):
+        resumed.step()
+
+    assert resumed.latest_snapshot() == uninterrupted.latest_snapshot()
+    assert resumed.engine.data_counter == uninterrupted.engine.data_counter > 0
+
+
+def test_resume_restores_zoom_and_speed(tmp_path):
+    # Packet positions and obstacle checks are in zoom-scaled pixels and sim_dt
+    # depends on the speed factor, so both must survive the round trip
+    path = tmp_path / "checkpoint.bin"
+
+    saved = build()
+    for _ in range(500):
+        saved.step()
+    saved.zoom = 2.5
+    saved.speed_factor = 0.1
+    saved.save_checkpoint(str(path))
+
+    resumed = build()
+    resumed.load_checkpoint(str(path))
+    assert (resumed.zoom, resumed.speed_factor) == (2.5, 0.1)
+    for sim in (saved, resumed):
+        for _ in range(500):
+            sim.step()
+    assert resumed.latest_snapshot() == saved.latest_snapshot()
+
+
+def test_seed_mismatch_is_rejected_without_changing_state(tmp_path):
+    path = tmp_path / "checkpoint.bin"
+    saved = build(seed=7)
+    for _ in range(100):
+        saved.step()
+    saved.save_checkpoint(str(path))
+
+    other = build(seed=8)
+    before = other.latest_snapshot()
+    with pytest.raises(CheckpointError):
+        other.load_checkpoint(str(path), seed=8)
+    assert other.latest_snapshot() == before
+    assert other.engine.seed == 8
+
+
+@pytest.mark.parametrize("seed", [-1, 2**64])
+def test_seed_outside_checkpoint_range_is_rejected(seed):
+    # Checkpoints store the seed as u64; fail at startup, not at the first autosave
+    with pytest.raises(ValueError):
+        build(seed=seed)
+
+
+def test_other_canvas_geometry_is_rejected(tmp_path):
+    path = tmp_path / "checkpoint.bin"
+    saved = build()
+    for _ in range(100):
+        saved.step()
+    saved.save_checkpoint(str(path))
+
+    for other in (build(pixels_per_au=40), build(center_x=600)):
+        before = other.latest_snapshot()
+        with pytest.raises(CheckpointError):
+            other.load_checkpoint(str(path))
+        assert other.latest_snapshot() == before
+
+
+def test_corrupt_checkpoint_is_ignored_on_resume(tmp_path):
+    path = tmp_path / "checkpoint.bin"
+    path.write_bytes(b"SSCK\x01\x00not a checkpoint")
+    sim = build()
+    sim.checkpoint_file = str(path)
+    assert "starting fresh" in sim.resume()
+    assert sim.tick == 0
+
+
+def test_corrupt_values_of_the_right_size_are_ignored_on_resume(tmp_path):
+    # Same length as a good checkpoint, so only value checks can catch it
+    path = tmp_path / "checkpoint.bin"
+    saved = build()
+    for _ in range(100):
+        saved.step()
+    saved.save_checkpoint(str(path))
+    data = bytearray(path.read_bytes())
+    mt_position = _HEADER.size + _GEOMETRY.size + _CLOCK.size + _VIEW.size + _COUNTERS.size + 624 * 4
+    struct.pack_into("<I", data, mt_position, 9999)
+    path.write_bytes(bytes(data))
+
+    sim = build(seed=8)
+    before = sim.latest_snapshot()
+    rng_state = sim.engine.rng.getstate()
+    sim.checkpoint_file = str(path)
+    assert "starting fresh" in sim.resume()
+    assert sim.latest_snapshot() == before
+    assert sim.engine.rng.getstate() == rng_state
+    assert sim.engine.seed == 8
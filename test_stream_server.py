@@ -0,0 +1,98 @@
+# test_stream_server.py
+import asyncio
+import pytest
+import config
+from bodies import create_solar_system
+from engine import SimulationEngine
+from sim_thread import SimulationThread
+from stream_server import StateStreamServer, StateMirror, _Client, decode_frame, read_frames, _LENGTH
+
+
+def build(seed=7):
+    sun, planets, satellites = create_solar_system(30, 500, 400)
+    engine = SimulationEngine(
+        satellites,
+        None,
+        object_speed=config.EFFECTIVE_DATA_SPEED,
+        obstacles=planets + [sun],
+        sim_start_date=config.SIM_START_DATE,
+        seed=seed
+    )
+    return SimulationThread(engine, [sun] + planets + satellites, 500, 400, zoom=2.0, checkpoint_every=0)
+
+
+def assert_mirrors(mirror, snapshot, bodies):
+    # Positions go over the wire as f32
+    assert mirror.tick == snapshot.tick
+    assert mirror.sim_datetime == snapshot.sim_datetime
+    assert mirror.zoom == pytest.approx(snapshot.zoom)
+    assert [body["name"] for body in mirror.body_table] == [body.name for body in bodies]
+    assert [mirror.bodies[i] for i in range(len(bodies))] == [pytest.approx(pos) for pos in snapshot.bodies]
+    assert mirror.mst_edges == set(snapshot.mst_edges)
+    assert mirror.packets == {pid: pytest.approx((x, y)) for pid, x, y in snapshot.packets}
+
+
+def test_viewer_mirrors_the_last_snapshot():
+    sim = build()
+    # Queue large enough that no frame is dropped, so the last one always arrives
+    server = StateStreamServer(sim.bodies, port=0, client_queue=1024).start()
+    sim.listeners.append(server.publish)
+
+    async def view():
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        mirror = StateMirror()
+        for _ in range(300):
+            sim.step()
+            await asyncio.sleep(0)
+        async for frame in read_frames(reader):
+            mirror.apply(frame)
+            if mirror.tick == sim.tick:
+                break
+        writer.close()
+        return mirror
+
+    try:
+        mirror = asyncio.run(asyncio.wait_for(view(), timeout=10))
+    finally:
+        server.stop()
+    snapshot = sim.latest_snapshot()
+    assert snapshot.packets and snapshot.mst_edges
+    assert_mirrors(mirror, snapshot, sim.bodies)
+
+    # A tick that ends after the server has stopped must not fail the simulation
+    sim.step()
+
+
+def test_full_client_queue_is_resynced_with_a_keyframe():
+    sim = build()
+    server = StateStreamServer(sim.bodies) # Not started: _broadcast() is driven by hand
+    mirror = StateMirror()
+
+    def publish_tick():
+        sim.step()
+        server._latest = sim.latest_snapshot()
+        server._broadcast()
+
+    def receive(client):
+        frame = decode_frame(client.queue.get_nowait()[_LENGTH.size:])
+        mirror.apply(frame)
+        return frame
+
+    async def run():
+        client = _Client(None, 1)
+        server.clients.add(client)
+        publish_tick()
+        assert receive(client)["keyframe"]
+
+        publish_tick()
+        publish_tick() # Queue still holds the previous delta
+        assert (client.dropped, client.needs_keyframe) == (1, True)
+        assert not receive(client)["keyframe"]
+        assert mirror.tick == sim.tick - 1 # One tick behind after the drop
+
+        publish_tick()
+        assert receive(client)["keyframe"]
+        assert not client.needs_keyframe
+
+    asyncio.run(run())
+    assert_mirrors(mirror, sim.latest_snapshot(), sim.bodies)
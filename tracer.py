@@ -0,0 +1,109 @@
+# tracer.py
+"""In-memory packet tracing.
+
+Events for sampled packets are packed as fixed-size binary records into a
+preallocated ring buffer; nothing is formatted or written until dump().
+The oldest records are overwritten once the buffer is full. dump() is
+slow for a full buffer, so run it on a copy() outside the simulation loop.
+"""
+import struct
+from datetime import datetime, timedelta
+
+# Event types
+GENERATED = 0   # sat = source satellite
+HOP = 1         # sat = current satellite, other = chosen target
+MOVE = 2        # sat = target satellite, value = remaining distance (px)
+ARRIVED = 3     # sat = destination, other = source, value = hop travel time (sim sec)
+DROPPED = 4     # sat = current satellite, other = target or -1 (no route)
+
+EVENT_NAMES = {
+    GENERATED: "GENERATED",
+    HOP: "HOP",
+    MOVE: "MOVE",
+    ARRIVED: "ARRIVED",
+    DROPPED: "DROPPED",
+}
+
+# event u8, packet id u32, sim time i64 (microseconds since 0001-01-01),
+# x f64, y f64, sat i16, other i16, value f64
+RECORD = struct.Struct("<BIqddhhd")
+
+_EPOCH = datetime(1, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_HASH_MULTIPLIER = 2654435761 # Knuth multiplicative hash, spreads sequential ids
+
+
+class PacketTracer:
+    def __init__(self, capacity=65536, sample_rate=0.05):
+        self.capacity = capacity
+        self.buffer = bytearray(capacity * RECORD.size)
+        self.written = 0 # Total records ever written; position = written % capacity
+        self.set_sample_rate(sample_rate)
+
+    def set_sample_rate(self, sample_rate):
+        """0.0 traces nothing, 1.0 traces every packet."""
+        self.sample_rate = sample_rate
+        self._threshold = int(sample_rate * 2**32)
+
+    def is_sampled(self, packet_id):
+        # Pure function of the id: no RNG is consumed and every event of a
+        # sampled packet is traced, from generation to removal.
+        return (packet_id * _HASH_MULTIPLIER) & 0xFFFFFFFF < self._threshold
+
+    def record(self, event, packet_id, sim_datetime, x, y, sat=-1, other=-1, value=0.0):
+        offset = (self.written % self.capacity) * RECORD.size
+        sim_micros = (sim_datetime - _EPOCH) // _MICROSECOND
+        RECORD.pack_into(self.buffer, offset, event, packet_id, sim_micros, x, y, sat, other, value)
+        self.written += 1
+
+    def records(self):
+        """Yields unpacked records, oldest first."""
+        count = min(self.written, self.capacity)
+        start = self.written - count
+        for n in range(start, self.written):
+            yield RECORD.unpack_from(self.buffer, (n % self.capacity) * RECORD.size)
+
+    def clear(self):
+        self.written = 0
+
+    def copy(self):
+        """Independent copy of the ring. A plain buffer copy, cheap enough to take
+        between ticks so the slow dump() can run on another thread."""
+        clone = PacketTracer(capacity=0, sample_rate=self.sample_rate)
+        clone.capacity = self.capacity
+        clone.buffer = bytearray(self.buffer)
+        clone.written = self.written
+        return clone
+
+    def dump(self, path, satellites=()):
+        """Formats the buffered records as text into path. Returns the number of records."""
+        names = [sat.name for sat in satellites]
+
+        def name(index):
+            if index < 0:
+                return "-"
+            return names[index] if index < len(names) else f"#{index}"
+
+        lines = []
+        for event, packet_id, sim_micros, x, y, sat, other, value in self.records():
+            sim_time = (_EPOCH + timedelta(microseconds=sim_micros)).strftime("%Y-%m-%d %H:%M:%S")
+            line = f"[{sim_time}] PktID: {packet_id:06} {EVENT_NAMES[event]:<9} ({x:.3f},{y:.3f})"
+            if event == GENERATED:
+                line += f" at {name(sat)}"
+            elif event == HOP:
+                line += f" {name(sat)} -> {name(other)}"
+            elif event == MOVE:
+                line += f" -> {name(sat)}, Dist: {value:.4f}"
+            elif event == ARRIVED:
+                line += f" at {name(sat)} from {name(other)}. TravelTime: {value:.2f}s"
+            elif event == DROPPED:
+                line += f" at {name(sat)}" + (f" towards {name(other)}" if other >= 0 else ", no route")
+            lines.append(line)
+
+        dropped = self.written - len(lines)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# {len(lines)} records, {dropped} older records overwritten, sample rate {self.sample_rate}\n")
+            f.write("\n".join(lines))
+            if lines:
+                f.write("\n")
+        return len(lines)